@@ -1,12 +1,15 @@
 # Imports
-from prep_data import col_dict
+from prep_data import col_dict, get_columns
 from datetime import datetime, timedelta
+from operator import itemgetter
+from collections import Counter, defaultdict
 import numpy as np
 
 
 def filter_year(data,
                  year_condition,
-                 year_col = "Start Date"):
+                 year_col = "Start Date",
+                 date_years = None):
     """
     Function for filtering data to a certain year, range of years 
     or list of years.
@@ -16,10 +19,20 @@ def filter_year(data,
     data           = list, list of lists (rows of data) returned by e.g. read_data_all
     year_condition = list or range of years that you want to filter to
     year_col       = string, the date column you want to select with col_dict to filter on
+    date_years     = np.array, the years of year_col for each row of data, from prep_data.get_date_years().
+    Pass this in if filtering the same data several times to filter with a numpy mask instead.
     """
+    # Without precomputed years, check each row's year directly in a single pass,
+    # as building the array of years would take longer than the filter itself
+    if date_years is None:
+        year_index = col_dict[year_col]
+        return [row for row in data if row[year_index].year in year_condition]
 
-    # Return all data where the chosen date column falls within the given year selection
-    return [row for row in data if row[col_dict[year_col]].year in year_condition]
+    # Mask of rows where the chosen date column falls within the given year selection
+    mask = np.isin(date_years, np.asarray(list(year_condition), dtype = np.int16))
+
+    # Return all data that satisfies the mask
+    return [data[i] for i in np.flatnonzero(mask)]
 
 
 
@@ -27,7 +40,8 @@ def filter_condition(data,
                 col1, condition1,
                 col2 = None, condition2 = None,
                 logical_and = True,
-                logical_or = False):
+                logical_or = False,
+                columns = None):
 
     """
     Function for filtering data by up to two conditions. If only one condition
@@ -48,68 +62,138 @@ def filter_condition(data,
     logical_and = bool, make true if you want to filter with AND on both conditions
     logical_or = bool, make true if you want to filter with OR on both conditions.
     Remember to make logical_and = False if you use this.
+    columns     = dict, numpy arrays of the columns of data, from prep_data.get_columns().
+    Pass this in if filtering the same data several times to filter with numpy masks instead.
     """
-    # Return data if filtered on condition 1 AND condition 2
-    if logical_and and condition1 and condition2:
-        return [row for row in data if row[col_dict[col1]] == condition1 and row[col_dict[col2]] == condition2]
+    # Let the user know their conditions need to be corrected 
+    if not condition1:
+        print("Conditions not properly specified")
+        return
 
-    # Return data if filtered on condition 1 OR condition 2
-    elif logical_or and condition1 and condition2:
-        return [row for row in data if row[col_dict[col1]] == condition1 or row[col_dict[col2]] == condition2]
+    # Without precomputed columns, check each row directly in a single pass,
+    # as building the column arrays would take longer than the filter itself
+    if columns is None:
+        col1_index = col_dict[col1]
 
-    # Return data if filtered on ONLY one condition, default is condition 1
-    elif condition1:
-        return [row for row in data if row[col_dict[col1]] == condition1]
+        # Return data if filtered on condition 1 AND condition 2
+        if logical_and and condition2:
+            col2_index = col_dict[col2]
+            return [row for row in data if row[col1_index] == condition1 and row[col2_index] == condition2]
 
-    # Let the user know their conditions need to be corrected 
+        # Return data if filtered on condition 1 OR condition 2
+        elif logical_or and condition2:
+            col2_index = col_dict[col2]
+            return [row for row in data if row[col1_index] == condition1 or row[col2_index] == condition2]
+
+        # Return data if filtered on ONLY one condition, default is condition 1
+        else:
+            return [row for row in data if row[col1_index] == condition1]
+
+    # Mask data if filtered on condition 1 AND condition 2
+    if logical_and and condition2:
+        mask = (columns[col1] == condition1) & (columns[col2] == condition2)
+
+    # Mask data if filtered on condition 1 OR condition 2
+    elif logical_or and condition2:
+        mask = (columns[col1] == condition1) | (columns[col2] == condition2)
+
+    # Mask data if filtered on ONLY one condition, default is condition 1
     else:
-        print("Conditions not properly specified")
+        mask = columns[col1] == condition1
+
+    # Return all data that satisfies the mask
+    return [data[i] for i in np.flatnonzero(mask)]
 
 
 
 def selector(data,
             value1 = "Winner",
-            value2 = None):
+            value2 = None,
+            columns = None):
     """
     Helper function to return the required value or two values from "data".
     If only one value is passed it returns a list of those values.
     If two values are passed it returns a list of lists, where each sublist
     is those two values.
+    If columns is passed, numpy arrays are returned instead: the column's array
+    for one value, or a 2 column array for two values. If the two columns have
+    different types (e.g. names and ranks), it is an object array so each value
+    keeps its own type.
     ---------------------------------------------------------------------
 
-    data   = list, list of lists (rows of data) returned by e.g. read_data_all
-    value1 = string, column that you want to return
-    value2 = string, the 2nd column that you want to return
+    data    = list, list of lists (rows of data) returned by e.g. read_data_all
+    value1  = string, column that you want to return
+    value2  = string, the 2nd column that you want to return
+    columns = dict, numpy arrays of the columns of data, from prep_data.get_columns().
+    Pass this in if selecting from the same data several times to select whole arrays instead.
     """
+    # Without precomputed columns, select from each row directly in a single pass,
+    # as converting the data to arrays costs more than it saves for one selection
+    if columns is None:
+        # Return data if only one value is needed
+        if not value2:
+            return [x[col_dict[value1]] for x in data]
+
+        # Return data if two values are needed
+        else:
+            return [[x[col_dict[value1]], x[col_dict[value2]]] for x in data]
+
     # Return data if only one value is needed
     if not value2:
-        return [x[col_dict[value1]] for x in data]
+        return columns[value1]
 
     # Return data if two values are needed
     else:
-        return [[x[col_dict[value1]], x[col_dict[value2]]] for x in data]
+        column1, column2 = columns[value1], columns[value2]
+        # Avoid numpy converting e.g. ranks into strings to match the names
+        if column1.dtype.kind != column2.dtype.kind:
+            column1, column2 = column1.astype(object), column2.astype(object)
+        return np.column_stack((column1, column2))
 
 
 def get_unique_players(data):
     """
-    Helper function to return a list of the unique players in "data".
+    Helper function to return a list of the unique players in "data",
+    sorted alphabetically.
     ---------------------------------------------------------------------
 
     data   = list, list of lists (rows of data) returned by e.g. read_data_all
     """
-    # Get all player 1s
-    players = [x[4] for x in data]
-    # Get all player 2s
-    players2 = [x[5] for x in data]
-    # Add the two together
-    players.extend(players2)
-    # Remove duplicates
-    unique_players = list(set(players))
+    # Get the set of all player 1s and add all player 2s to it, removing duplicates
+    # without building any intermediate lists of players
+    unique_players = set(map(itemgetter(4), data)).union(map(itemgetter(5), data))
 
-    return unique_players
+    # Sort alphabetically, so the order doesn't change from run to run
+    return sorted(unique_players)
 
 
-def calc_ww(data):
+def get_player_ids(data):
+    """
+    Helper function to encode the players in "data" as integer ids, so the ranking
+    algorithms can work with arrays indexed by player id instead of dicts keyed by name.
+    It returns the sorted array of unique players (a player's id is their index in this array),
+    along with arrays of the winner's id and the loser's id for each row/match.
+    ---------------------------------------------------------------------
+
+    data   = list, list of lists (rows of data) returned by e.g. read_data_all
+    """
+    # Get the winner and loser columns, every player 1 and player 2 is in one of these
+    winners = list(map(itemgetter(11), data))
+    losers = list(map(itemgetter(12), data))
+
+    # Get sorted list of unique players, so the ids don't change from run to run
+    unique_players = sorted(set(winners).union(losers))
+    # Map winners and losers to their index in unique players with a dict lookup,
+    # which is much quicker than sorting the names again with np.unique
+    player_index = dict(zip(unique_players, range(len(unique_players))))
+    win_ids = np.fromiter(map(player_index.__getitem__, winners), dtype = int, count = len(data))
+    lose_ids = np.fromiter(map(player_index.__getitem__, losers), dtype = int, count = len(data))
+
+    return np.array(unique_players), win_ids, lose_ids
+
+
+def calc_ww(data,
+            player_ids = None):
     """
     Function to rank the players in "data" according to the Winners Win algorithm.
     It returns a list of tuples where each tuple contains the player's name
@@ -117,32 +201,37 @@ def calc_ww(data):
     The list has been sorted in descending order of matches won.
     ---------------------------------------------------------------------
 
-    data   = list, list of lists (rows of data) returned by e.g. read_data_all
+    data       = list, list of lists (rows of data) returned by e.g. read_data_all
+    player_ids = tuple, the unique players, winner ids and loser ids of data, as returned by get_player_ids().
+    Pass this in if running several ranking algorithms on the same data to count wins with np.bincount instead.
     """
+    # With precomputed ids, make array of match counts indexed by player id.
+    # Players who never won keep a count of 0
+    if player_ids is not None:
+        unique_players, win_ids, _ = player_ids
+        match_counter = np.bincount(win_ids, minlength = len(unique_players))
+        # Order descending by number of matches won, keeping alphabetical order for ties
+        order = np.argsort(-match_counter, kind = "stable")
+        return list(zip(unique_players[order].tolist(), match_counter[order].tolist()))
+
+    # Make dictionary with unique players as keys, match counts of 0 as values
+    match_counter = dict.fromkeys(get_unique_players(data), 0)
+    # Count every winner's matches won in a single pass with Counter, rather than a
+    # try/except per row, and add them in. Players who never won keep a count of 0
+    match_counter.update(Counter(map(itemgetter(11), data)))
 
-    # Get list of unique players from data
-    unique_players = get_unique_players(data)
-    # Make dictionary with unique players as keys, match counts as values
-    match_counter = {x:0 for x in unique_players}
-
-    # Iterate through data
-    for row in data:
-        # Exception is rare, so try except is faster than if statement
-        try: 
-            match_counter[row[11]] += 1
-        except KeyError:
-            pass
     # Order the dictionary descending by number of matches won
     matches_won = sorted(match_counter.items(), 
                         # More wins is best
                         reverse = True,
                         # Make the sort key the dict value, not dict key
-                        key = lambda item: item[1])
+                        key = itemgetter(1))
     
     return matches_won
 
 
-def calc_wdl(data):
+def calc_wdl(data,
+             player_ids = None):
     """
     Function to rank the players in "data" according to the Winners Don't Lose algorithm.
     It returns a list of tuples where each tuple contains the player's name
@@ -151,39 +240,68 @@ def calc_wdl(data):
     so best ranked players are at the start of the list.
     ---------------------------------------------------------------------
 
-    data   = list, list of lists (rows of data) returned by e.g. read_data_all
+    data       = list, list of lists (rows of data) returned by e.g. read_data_all
+    player_ids = tuple, the unique players, winner ids and loser ids of data, as returned by get_player_ids().
+    Pass this in if running several ranking algorithms on the same data, otherwise it is calculated here.
     """
-    # Get list of unique players from data
-    unique_players = get_unique_players(data)
-    # Make dictionary with unique players as keys, match counts as values
-    wdl_dict = {x:0 for x in unique_players}
-
-    # Iterate through data
-    for row in data:
-        # Update winners with r
-        try:
-            wdl_dict[row[11]] += row[14]
-        except KeyError:
-            pass
-        # Update losers with -1/r
-        try:
-            wdl_dict[row[12]] -= (1 / row[14])
-        except KeyError:
-            pass
-
-    # Order the dictionary descending by algorithm score
-    wdl_dict_sorted = sorted(wdl_dict.items(), 
-                        # Higher score is best
-                        reverse = True,
-                        # Make the sort key the dict value, not dict key
-                        key = lambda item: item[1])
+    # Get the round number column
+    r = np.fromiter(map(itemgetter(14), data), dtype = np.float64, count = len(data))
+    # Rows without a round number would give an infinite -1/r
+    if (r == 0).any():
+        raise ValueError("Rows need their round number r, e.g. from prep_data.reconstruct_all_brackets()")
+
+    # Get sorted array of unique players from data, and the ids of the winners and losers
+    if player_ids is None:
+        player_ids = get_player_ids(data)
+    unique_players, win_ids, lose_ids = player_ids
+
+    # Make array of algorithm scores, indexed by player id,
+    # scatter-adding r for each win and -1/r for each loss
+    wdl_scores = np.bincount(win_ids, weights = r, minlength = len(unique_players))
+    wdl_scores -= np.bincount(lose_ids, weights = 1 / r, minlength = len(unique_players))
+
+    # Order descending by algorithm score (higher score is best)
+    order = np.argsort(-wdl_scores, kind = "stable")
+    wdl_dict_sorted = list(zip(unique_players[order].tolist(), wdl_scores[order].tolist()))
     
     return wdl_dict_sorted
 
 
+def wbw_iteration(wbw_scores, win_ids, lose_ids, num_matches, inv_losses, damping = 0.85, out = None):
+    """
+    Helper function for calc_wbw() that runs a single iteration of the Winners Beat Winners algorithm.
+    It only works with plain numpy arrays of player indexes and scores (no dicts or player names),
+    and returns an array of the updated scores.
+    ---------------------------------------------------------------------
+
+    wbw_scores  = np.array, the current wbw_score of each player
+    win_ids     = np.array, the index of the winner of each distinct winner-loser pairing
+    lose_ids    = np.array, the index of the loser of each distinct winner-loser pairing
+    num_matches = np.array, the number of times the loser lost to the winner in each pairing
+    inv_losses  = np.array, 1 / number of matches each player lost, or 0 if they never lost
+    damping     = float, the weight given to the shares of score passed between players
+    out         = np.array, optional array to write the updated scores into, rather than making a new one
+    """
+    n = len(wbw_scores)
+    # Calculate each player's share of score
+    share_of_score = wbw_scores * inv_losses
+    # Pass this share of score to everyone who beat them
+    # Giving multiple shares to those who beat them multiple times
+    shares = np.bincount(win_ids, weights = share_of_score[lose_ids] * num_matches, minlength = n)
+
+    # Updates scores to be sum of shares received and rescale, in place
+    out = np.multiply(shares, damping, out = out)
+    out += (1 - damping) / n
+
+    return out
+
+
 def calc_wbw(data,
              display_convergence = True, 
-             stopping_threshold = 0.00000000001):
+             stopping_threshold = 0.00000000001,
+             stall_limit = 5,
+             init_scores = None,
+             player_ids = None):
     """
     Function to rank the players in "data" according to the Winners Beat Winners algorithm.
     It returns a list of tuples where each tuple contains the player's name
@@ -197,68 +315,92 @@ def calc_wbw(data,
     display_convergence = bool, set true if you want to see which loop
     the algorithm converged on
 
-    stopping_threshold = float, the absolute minimum difference between
-    smallest and largest wbw_scores from one iteration to the next that is
-    used to determine if the algorithm has converged
+    stopping_threshold = float, the largest change in any player's wbw_score
+    from one iteration to the next that is used to determine if the algorithm
+    has converged
+
+    stall_limit = int, once the largest change is within 1000 times stopping_threshold,
+    the algorithm also stops if the change fails to get smaller for this many iterations
+    in a row, e.g. once it can't get any closer due to floating point error
+
+    init_scores = dict, player names as keys and wbw_scores as values to start
+    the algorithm from, e.g. the scores from a previous, overlapping run of calc_wbw.
+    Players missing from it start at 1 / number unique players. Starting close to the
+    final scores means fewer iterations are needed to converge.
+
+    player_ids = tuple, the unique players, winner ids and loser ids of data, as returned by get_player_ids().
+    Pass this in to skip encoding the players, e.g. when running calc_wbw on many slices of the same data.
     """
-    # Get the unique list of tennis players in the data
-    unique_players = get_unique_players(data)
+    # Get the sorted array of unique tennis players in the data, and the ids of each match's winner and loser.
+    # These ids are the players that each player lost to as a sparse matrix
+    # in coordinate form: one entry per match, from loser to winner
+    if player_ids is None:
+        player_ids = get_player_ids(data)
+    unique_players, win_ids, lose_ids = player_ids
     n = len(unique_players)
-    # Make dictionary with unique players as keys, 1 / number unique players as values
-    wbw_dict = {x : (1 / n) for x in unique_players}
-
-    # Get dict of players that each player lost to
-    beaten_by_dict = dict()
-    for k in unique_players:
-        beaten_by = [x[11] for x in data if x[12] == k]
-        beaten_by_dict[k] = beaten_by
+    # Make array of scores, indexed by player id, with 1 / number unique players as values
+    wbw_scores = np.full(n, 1 / n)
+    # Or warm start from the given scores, rescaled to sum to 1
+    if init_scores:
+        wbw_scores = np.array([init_scores.get(player, 1 / n) for player in unique_players.tolist()])
+        wbw_scores /= wbw_scores.sum()
+
+    # Precompute 1 / number of times each player lost, so each loser passes
+    # their whole score on, split evenly across the matches they lost.
+    # Players who never lost are left at 0, so pass on no share of their score
+    num_losses = np.bincount(lose_ids, minlength = n)
+    lost = num_losses > 0
+    inv_losses = np.zeros(n)
+    inv_losses[lost] = 1 / num_losses[lost]
+
+    # Merge repeat matches between the same loser and winner into a single weighted pairing,
+    # so each iteration only passes shares once along each distinct pairing
+    pairings, num_matches = np.unique(lose_ids * n + win_ids, return_counts = True)
+    pair_lose_ids, pair_win_ids = np.divmod(pairings, n)
+
+    # Preallocate the arrays each iteration writes into, so no new arrays are made per iteration
+    wbw_scores_new = np.empty(n)
+    score_changes = np.empty(n)
+
+    # Track the smallest change so far near convergence, and how many iterations it's failed to improve on
+    best_change = np.inf
+    stalls = 0
 
     # Run algorithm until convergence / stopping criteria reached
     for i in range(1000):
         
-        # Get separate dict for shares of scores to be added to
-        shares_dict = {x : 0 for x in beaten_by_dict.keys()}
-        
-        # Get max and min values for stopping condition
-        max_score_pre = max([v for v in wbw_dict.values()])
-        min_score_pre = min([v for v in wbw_dict.values()])
-        
-        # Iterate through player and the players who beat them
-        for k, victors in beaten_by_dict.items():
-            # If they lost at some point (likely)
-            if not len(victors) == 0: 
-                # Calculate share of score
-                share_of_score = (wbw_dict[k] / len(victors))
-                
-                # Pass this share of score to everyone who beat them
-                # Giving multiple shares to those who beat them multiple times
-                for victor in victors:
-                    shares_dict[victor] += share_of_score
-                    
-            # Handle case where player never lost
-            else:
-                # Pass current score to themselves
-                wbw_dict[k] += wbw_dict[k]  
-
-        # Updates scores to be sum of shares received and rescale
-        wbw_dict = {k : ((v * 0.85) + (0.15 / n)) for k, v in shares_dict.items()}
-
-        # Stopping criteria- have the max and min values changed much?
-        max_score_post = max([v for v in wbw_dict.values()])
-        min_score_post = min([v for v in wbw_dict.values()])
+        # Pass shares of scores from losers to winners and rescale
+        wbw_iteration(wbw_scores, pair_win_ids, pair_lose_ids, num_matches, inv_losses,
+                      out = wbw_scores_new)
+
+        # Stopping criteria- has any player's score changed much?
+        np.subtract(wbw_scores_new, wbw_scores, out = score_changes)
+        max_change = np.max(np.abs(score_changes, out = score_changes))
+        # Swap arrays so the new scores are current and the old array is reused next iteration
+        wbw_scores, wbw_scores_new = wbw_scores_new, wbw_scores
         
         # Enforce stopping criteria
-        if abs(max_score_post - max_score_pre) < stopping_threshold and abs(min_score_post - min_score_pre) < stopping_threshold:
+        if max_change < stopping_threshold:
             if display_convergence:
                 print(f"Converged on loop {i}")
             break
+
+        # Stop early if the change has stopped getting any smaller, once it's within 1000 times the threshold.
+        # Stalls aren't counted before then, as the change can rise again after a small early step
+        if max_change < 1000 * stopping_threshold:
+            if max_change < best_change:
+                best_change = max_change
+                stalls = 0
+            else:
+                stalls += 1
+                if stalls >= stall_limit:
+                    if display_convergence:
+                        print(f"Stopped improving on loop {i}")
+                    break
         
-    # Order the dictionary descending by algorithm score
-    wbw_dict_sorted = sorted(wbw_dict.items(), 
-                        # Higher score is best
-                        reverse = True,
-                        # Make the sort key the dict value, not dict key
-                        key = lambda item: item[1])
+    # Order descending by algorithm score (higher score is best)
+    order = np.argsort(-wbw_scores, kind = "stable")
+    wbw_dict_sorted = list(zip(unique_players[order].tolist(), wbw_scores[order].tolist()))
     
     return wbw_dict_sorted
 
@@ -282,64 +424,92 @@ def compare_wbw_wta(data, all_data, stopping_threshold = 0.00000000001):
 
     all_data = list, list of lists (rows of data) returned by e.g. read_data_all
 
-    stopping_threshold = float, the absolute minimum difference between
-    smallest and largest wbw_scores from one iteration to the next that is
-    used to determine if the algorithm has converged
+    stopping_threshold = float, the largest change in any player's wbw_score
+    from one iteration to the next that is used to determine if the algorithm
+    has converged
     """
     all_ranks = list()
-    all_ranks_alt = list()
 
-    # Get list of tournaments in particular years to iterate through
-    tourn_list = set([x[10] for x in data])
+    # Group the data for each tournament in particular years in a single pass, to get WTA ranks from
+    tourn_groups = defaultdict(list)
+    for x in data:
+        tourn_groups[x[10]].append(x)
+    # Get list of tournaments to iterate through,
+    # in order of start date so consecutive tournaments have overlapping 52 week windows
+    tourn_list = sorted(tourn_groups, key = lambda tourn: tourn.split()[-1])
+    # WBW scores from the previous tournament, used to warm start the next one.
+    # This only changes where calc_wbw starts from, so the scores still match
+    # a cold start to within stopping_threshold
+    prev_scores = None
+
+    # Sort all data by start date once, so the data for any date window is a single slice
+    all_data = sorted(all_data, key = lambda x: x[1])
+    all_dates = np.array([x[1] for x in all_data], dtype = "datetime64[D]")
+    # Encode the players in all data as integer ids once, rather than once per tournament
+    all_players, all_win_ids, all_lose_ids = get_player_ids(all_data)
 
     # Iterate through tournament-years
     for tourn in tourn_list:
         # Select data for that tournament in that year to get WTA ranks
-        tourn_data = [x for x in data if x[10] == tourn]
+        tourn_data = tourn_groups[tourn]
         
         start_date = datetime.strptime(tourn.split()[-1], "%Y-%m-%d")
         weeks_52_prior = start_date - timedelta(weeks = 52)
         # Select data for 52 weeks before and up to that tournament in that year
         # This includes the 2007 data that we use to initialise our 2008 estimates with
-        tourn_wbw_data = [x for x in all_data if x[1] >= weeks_52_prior and x[1] <= start_date]
+        lower = np.searchsorted(all_dates, np.datetime64(weeks_52_prior, "D"), side = "left")
+        upper = np.searchsorted(all_dates, np.datetime64(start_date, "D"), side = "right")
+        tourn_wbw_data = all_data[lower:upper]
+        # Re-encode the ids of the players in that window as 0 to n - 1,
+        # which only needs integers rather than player names
+        window_ids, tourn_ids = np.unique(np.concatenate((all_win_ids[lower:upper], all_lose_ids[lower:upper])),
+                                          return_inverse = True)
+        tourn_win_ids, tourn_lose_ids = tourn_ids.reshape(2, -1)
         tourn_wbw_scores = calc_wbw(tourn_wbw_data, 
                                     display_convergence = False,
-                                    stopping_threshold = stopping_threshold)
-
-        # Create dict of players as keys with WBW scores as values in a list
-        # It's stored as a list so that the WTA rank can be appended to it
-        ranks_data = {k : [v] for k,v in tourn_wbw_scores}
-        # An alternative way of storing the WBW scores, puts them into rank format
-        # for more intuitive comparison with WTA ranks.
-        ranks_data_alt = {k : [rank] for rank, k in enumerate(sorted(ranks_data, key = ranks_data.get, reverse = True), 1)}
-        
-        # Append the WTA ranks to ranks_data dict
-        # Taking their first recorded rank as the rank if they changed mid tournament
-        for row in tourn_data:
-            # Add player 1's WTA rank, if it's not already been added (e.g. take their first rank)
-            # Doesn't add players who lacked a WTA rank (coded as 0 currently)
-            if len(ranks_data[row[4]]) == 1 and row[6] != 0:
-                ranks_data[row[4]].append(row[6])
-                # Also add it to the alternative ranks data
-                ranks_data_alt[row[4]].append(row[6])
-            
-            # Add player 2's WTA rank, if it's not already been added (e.g. take their first rank)
-            # Doesn't add players who lacked a WTA rank (coded as 0 currently)
-            if len(ranks_data[row[5]]) == 1 and row[7] != 0:
-                ranks_data[row[5]].append(row[7])
-                # Also add it to the alternative ranks data
-                ranks_data_alt[row[5]].append(row[7])
-
-        # Select only the ranks for players in the previous 52 weeks, but also
-        # who actually played in the current tournament-year
-        tourn_ranks = [v for v in ranks_data.values() if len(v) == 2]
-        tourn_ranks_alt = [v for v in ranks_data_alt.values() if len(v) == 2]
-        # Add tournament specific data to overall data
-        all_ranks.extend(tourn_ranks)
-        all_ranks_alt.extend(tourn_ranks_alt)
-    # Make into arrays and combine to get WBW data in both score and rank format
-    all_ranks = np.array(all_ranks)
-    all_ranks_alt = np.array([x[0] for x in all_ranks_alt])
+                                    stopping_threshold = stopping_threshold,
+                                    init_scores = prev_scores,
+                                    player_ids = (all_players[window_ids], tourn_win_ids, tourn_lose_ids))
+        prev_scores = dict(tourn_wbw_scores)
+
+        # Get arrays of the WBW scores and the players they belong to.
+        # calc_wbw already sorts players by descending score, so their position is their WBW rank,
+        # an alternative way of storing the WBW scores for more intuitive comparison with WTA ranks.
+        wbw_players = np.array([k for k, _ in tourn_wbw_scores])
+        wbw_scores = np.array([v for _, v in tourn_wbw_scores])
+        wbw_order = np.argsort(wbw_players)
+
+        # Get each player's WTA rank in the tournament, interleaving player 1 and player 2
+        # in row order so the first recorded rank is taken if they changed mid tournament
+        columns = get_columns(tourn_data, ["Player 1", "Player 2", "Rank 1", "Rank 2"])
+        players = np.column_stack((columns["Player 1"], columns["Player 2"])).ravel()
+        wta_ranks = np.column_stack((columns["Rank 1"], columns["Rank 2"])).ravel()
+        # Drop players who lacked a WTA rank (coded as 0 currently)
+        has_rank = wta_ranks != 0
+        players, wta_ranks = players[has_rank], wta_ranks[has_rank]
+        # Take the first recorded rank for each player
+        ranked_players, first_index = np.unique(players, return_index = True)
+        wta_ranks = wta_ranks[first_index]
+
+        # Find the position of these players in the WBW scores, e.g. only the ranks for players
+        # in the previous 52 weeks who actually played in the current tournament-year
+        found = np.searchsorted(wbw_players, ranked_players, sorter = wbw_order)
+        positions = wbw_order[np.minimum(found, len(wbw_players) - 1)]
+        # searchsorted gives a position for any name, so check they really are the same player.
+        # Every player in the tournament should have played in the 52 week window up to it
+        missing = wbw_players[positions] != ranked_players
+        if missing.any():
+            raise KeyError(f"Players missing from WBW scores for {tourn}: {ranked_players[missing].tolist()}")
+        # Keep the players in descending order of WBW score
+        order = np.argsort(positions)
+        positions, wta_ranks = positions[order], wta_ranks[order]
+
+        # Add tournament specific data to overall data, with WBW data in both score and rank format
+        all_ranks.append(np.column_stack((wbw_scores[positions], wta_ranks, positions + 1)))
 
     # return the combined data
-    return np.column_stack((all_ranks, all_ranks_alt))
\ No newline at end of file
+    # No tournaments in data means no ranks to compare
+    if not all_ranks:
+        return np.empty((0, 3))
+
+    return np.concatenate(all_ranks)
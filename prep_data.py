@@ -1,199 +1,219 @@
 # Imports
-from datetime import datetime
+from collections import defaultdict, Counter
+import csv
+from multiprocessing import Pool, cpu_count
 import numpy as np
-import math
 
-def pre_process(line):
+def pre_process(players):
     """
     Pre-processing function to handle some errors that were identified in the data.
     This used to contain a lot more code, but much was removed when the data was updated.
     Only the incorrect naming for Sharapova is left in.
-    It takes a line read from the opened csv in the read_data function (below), fixes these errors and returns the fixed line.
+    It takes a column of player names parsed in the read_columns function (below), fixes these errors
+    for the whole column at once and returns the fixed column.
     ---------------------------------------------------------------------
 
-    line = str, line from opened csv in read_data
+    players = np.array, the player 1 or player 2 of every line from read_columns
     """
     # There were several pieces of dodgy/incorrect data, much of which was corrected in the data update
     # Sharapova's name at times didn't follow the naming convention for all other players
-    line = line.replace('"Sharapova, M."', 'Sharapova M.')
+    # It was quoted in the csv, so the csv reader has already removed the quotes
+    players = np.where(players == "Sharapova, M.", "Sharapova M.", players)
 
-    return line
+    return players
 
-def handle_dodgy_dates(split_line):
+def handle_dodgy_dates(start_dates):
     """
-    Helper function for processing the dates of the split lines in process_line (below).
+    Helper function for processing the start dates of all the lines of a csv at once, in read_data (below).
     Many tournaments in this dataset were incorrectly broken up over two years.
     The tournaments that ran from the end of the year (29th, 30th or 31st December) were broken up and given different start dates.
     For example, the 2014 Brisbane Internaional or many of the ASB Classics have different start dates for the same tournament- which is incorrect.
     These rows were just given the 1st of Jan of the next year as the start date for the matches that took place in the following year.
 
-    To rectify this, all the dates 29th-31st Dec are modified in place as 1st Jan for the following year.
+    To rectify this, all the dates 29th-31st Dec are returned as 1st Jan for the following year.
+    This is done with vectorised numpy date arithmetic over the whole column, rather than line by line.
 
     The data was checked to ensure this didn't change tournaments that shouldn't have had their dates changed.
     The end dates were left unchanged as they aren't used later, and serve as a flag for this dodgy data.
     ---------------------------------------------------------------------
     
-    split_line = list of dates and strings, from process_line()
+    start_dates = np.array, the start dates of every line as numpy datetime64 days
     """
-    # Handle the dodgy dates. 
-    if split_line[1].month == 12 and split_line[1].day in [29, 30, 31]:
-        split_line[1] = datetime(split_line[1].year + 1, 1, 1)
+    # Find the month and day of the month of each start date
+    start_months = start_dates.astype("datetime64[M]")
+    month = start_months.astype(int) % 12 + 1
+    day = (start_dates - start_months).astype(int) + 1
 
+    # Handle the dodgy dates, moving them to the 1st of Jan of the next year
+    dodgy = (month == 12) & (day >= 29)
+    next_new_year = (start_dates.astype("datetime64[Y]") + 1).astype("datetime64[D]")
 
-def process_line(line):
-    """
-    Key function for processing lines of data read in from opened csv in read_data(). 
-    It returns a list of variables that have been parsed from the line. 
-    It also appends a concatenation of tournament and start date to the line
-    to help avoid nested looping later on.
-    ---------------------------------------------------------------------
-    
-    line = str, line from opened csv in read_data
-    """
-    # Remove whitespace and make into list
-    clean_line = line.strip().split(",")
-    # Parse dates as datetimes
-    clean_line[1] = datetime.strptime(clean_line[1], "%Y-%m-%d")
-    clean_line[2] = datetime.strptime(clean_line[2], "%Y-%m-%d")
-    
-    # Handle dodgy dates
-    handle_dodgy_dates(clean_line)
-
-    # Parse best of and ranks as ints, making missing ranks zeroes
-    clean_line[3] = int(clean_line[3])
-    # int float combo is needed as the data is stored in text as string floats
-    clean_line[6] = int(float(clean_line[6] or 0))
-    clean_line[7] = int(float(clean_line[7] or 0))
-
-    # Change set results in line to help make them into numpy array later
-    for set_result in [8,9,10]:
-        # Deal with empty sets
-        if not clean_line[set_result]:
-            clean_line[set_result] = "0-0"
-        clean_line[set_result] = clean_line[set_result].split("-")
-
-    # Make set results into numpy array
-    results_array = np.array([clean_line[8], clean_line[9], clean_line[10]], dtype=int)
-    # Replace results with array and remove now unnecessary columns
-    clean_line[8] = results_array
-    final_line = clean_line[:9]
-    # Re-add the comment
-    final_line.append(clean_line[-1])
-    # Append a merge of start and tournament name as well,
-    # so we can avoid nested loops later on
-    final_line.append(final_line[0] + " " + str(final_line[1].date()))
-
-    return final_line
-
-
-def find_winner_loser(clean_line):
+    return np.where(dodgy, next_new_year, start_dates)
+
+
+def find_winner_loser(players_1, players_2, comments, results):
     """
-    Takes a processed line of data and determines who the winner and loser were. 
-    Modifies the line in place, appending the winner and then the loser.
+    Takes the parsed columns of data for a csv and determines who the winner and loser were
+    in every line at once, using vectorised numpy operations on the set results.
+    Returns an array of the winners and an array of the losers, in the same order as the lines.
     It has three procedures to handle: 2 set, 3 set and retirement matches.
     ---------------------------------------------------------------------
     
-    clean_line = list, the processed line of text from process_line()
+    players_1 = np.array, the player 1 of every line
+    players_2 = np.array, the player 2 of every line
+    comments  = np.array, the comment of every line
+    results   = np.array, the set results of every line, one 3 x 2 array of games won per line
     """
-    
-    # Handle matches with a retirement
-    if clean_line[-2] != 'Completed':
-        retiree = clean_line[-2].replace(" Retired", "")
-        # If player 1 is the retiree
-        if clean_line[4] == retiree:
-            # Player 2 is the winner
-            clean_line.append(clean_line[5])
-            # Player 1 is the loser
-            clean_line.append(clean_line[4])
-        else:
-            # Player 1 is the winner
-            clean_line.append(clean_line[4])
-            # Player 2 is the loser
-            clean_line.append(clean_line[5])
-            
+    # Player 1's score minus player 2's for every set
+    set_diffs = results[:, :, 0] - results[:, :, 1]
+
     # Handle two set matches
     # Check if third set is [0,0], the recoding of "" / no set played
-    elif np.all(clean_line[8][2] == 0):
-        # If player 1's result is higher than player 2's
-        if clean_line[8][0, 0] > clean_line[8][0, 1]:
-            # player 1 is the winner
-            clean_line.append(clean_line[4])
-            # Player 2 is the loser
-            clean_line.append(clean_line[5])
-        else:
-            # Player 2 is the winner
-            clean_line.append(clean_line[5])
-            # Player 1 is the loser
-            clean_line.append(clean_line[4])
-        
+    two_sets = np.all(results[:, 2] == 0, axis = 1)
+    # If player 1's result is higher than player 2's in the first set, player 1 is the winner
+    player_1_won = set_diffs[:, 0] > 0
+
     # Handle 3 set matches
-    else:
-        # Check number of sets where player 1's score minus player 2's is positive
-        if ( (clean_line[8][:, 0] - clean_line[8][:, 1] > 0).sum() ) > 1:
-            # If this happens more than once, player 1 is the winner
-            clean_line.append(clean_line[4])
-            # Player 2 is the loser
-            clean_line.append(clean_line[5])
-        else:
-            # Player 2 is the winner
-            clean_line.append(clean_line[5])
-            # Player 1 is the loser
-            clean_line.append(clean_line[4])
+    # Check number of sets where player 1's score minus player 2's is positive
+    # If this happens more than once, player 1 is the winner
+    player_1_won = np.where(two_sets, player_1_won, (set_diffs > 0).sum(axis = 1) > 1)
+
+    # Handle matches with a retirement
+    # Player 1 is the winner unless they are the retiree
+    retired = comments != 'Completed'
+    player_1_retired = comments == np.char.add(players_1, " Retired")
+    player_1_won = np.where(retired, ~player_1_retired, player_1_won)
+
+    # Get the winners and losers
+    winners = np.where(player_1_won, players_1, players_2)
+    losers = np.where(player_1_won, players_2, players_1)
+
+    return winners, losers
+
+
+def read_columns(file_path):
+    """
+    Reads in a csv at the given file-path and parses it column by column (a struct of arrays),
+    rather than line by line. Every field is parsed for all lines at once with numpy.
+    Returns a dict of numpy arrays keyed by the col_dict_cols names, with the same columns
+    that read_data() gives each row. The header row is skipped.
+    ---------------------------------------------------------------------
+    
+    file_path = Path to csv of tennis data to read in.
+    """
+    # Open connection to file and read in the whole file as bytes at once
+    with open(file_path, 'rb') as raw_data:
+        raw_bytes = raw_data.read()
+    # Decode it all in one go and split into lines
+    lines = raw_bytes.decode("utf-8").splitlines()
+
+    # Split into fields with the C-based csv reader
+    reader = csv.reader(lines)
+    # Skip the header row, keeping it to know how many fields there are
+    header = next(reader)
+    # Check every line has a value for every field, as transposing would
+    # otherwise silently cut every field down to the shortest line
+    rows = list()
+    for row in reader:
+        # Skip blank lines, e.g. at the end of the file
+        if not row:
+            continue
+        if len(row) != len(header):
+            raise ValueError(f"Line {reader.line_num} of {file_path} has {len(row)} fields, expected {len(header)}")
+        rows.append(row)
+    # Transpose the lines into one tuple per field
+    fields = list(zip(*rows)) or [()] * len(header)
+
+    columns = dict()
+    columns["Tournament"] = np.array(fields[0], dtype = str)
+    # Parse dates as numpy dates, handling dodgy start dates
+    columns["Start Date"] = handle_dodgy_dates(np.array(fields[1], dtype = "datetime64[D]"))
+    columns["End Date"] = np.array(fields[2], dtype = "datetime64[D]")
+    columns["Best Of"] = np.array(fields[3], dtype = int)
+    # Remove data errors from the player names
+    columns["Player 1"] = pre_process(np.array(fields[4], dtype = str))
+    columns["Player 2"] = pre_process(np.array(fields[5], dtype = str))
+    # Parse ranks, making missing ranks zeroes
+    # float then int is needed as the data is stored in text as string floats
+    columns["Rank 1"] = np.array([rank or 0 for rank in fields[6]], dtype = float).astype(int)
+    columns["Rank 2"] = np.array([rank or 0 for rank in fields[7]], dtype = float).astype(int)
+
+    # Make set results for every line into a single numpy array, one 3 x 2 array of games won per line
+    # Empty sets are recoded as 0-0
+    columns["Results"] = np.array([set_result.split("-") if set_result else [0, 0]
+                                   for sets in zip(*fields[8:11]) for set_result in sets],
+                                  dtype = int).reshape(-1, 3, 2)
+    columns["Comment"] = np.array(fields[11], dtype = str)
+
+    # Add a merge of start and tournament name as well, so we can avoid nested loops later on
+    columns["Tournament-Start"] = np.char.add(np.char.add(columns["Tournament"], " "),
+                                              columns["Start Date"].astype(str))
+    # Find winner and loser of every line
+    columns["Winner"], columns["Loser"] = find_winner_loser(columns["Player 1"], columns["Player 2"],
+                                                            columns["Comment"], columns["Results"])
+    # Add zeroes to help with bracket reconstruction and algorithms later on
+    columns["Round"] = np.zeros(len(columns["Tournament"]), dtype = int)
+    columns["r"] = np.zeros(len(columns["Tournament"]), dtype = int)
+
+    return columns
 
 
 def read_data(file_path):
     """
-    Reads in a csv at the given file-path. Reads it in and processes it line by line.
+    Reads in a csv at the given file-path, parsing it column by column with read_columns().
     Returns a list of lists, each sublist corresponds to a row in the csv- a list of parsed
-    variables. The header row is skipped too.
+    variables in the order of col_dict_cols. The header row is skipped too.
     Each line has 0 appended to it twice as well, to make bracket reconstruction easier later on
     and to help with algorithms later too.
     ---------------------------------------------------------------------
     
     file_path = Path to csv of tennis data to read in.
     """
-    
-    clean_data = list()
-    # Open connection to file
-    raw_data = open(file_path, 'r')
-    # Skip header row
-    next(raw_data)
-
-    # Read in actual data, clean and append to list
-    for line in raw_data:
-        # Remove data errors
-        line = pre_process(line)
-        # Parse data and split into list
-        clean_line = process_line(line)
-        # Find winner and loser
-        find_winner_loser(clean_line)
-        # Append 0 to help with bracket reconstruction later
-        clean_line.append(0)
-        # Append 0 to help with algorithms later too
-        clean_line.append(0)
-
-        # Append line to overall data
-        clean_data.append(clean_line)
-
-    return clean_data
+    columns = read_columns(file_path)
+
+    row_columns = list()
+    for col in col_dict_cols:
+        column = columns[col]
+        # Keep each row's set results as its own 3 x 2 array
+        if col == "Results":
+            row_columns.append(list(column))
+        # Convert dates to datetimes, via microseconds so they convert to datetimes rather than dates
+        elif column.dtype.kind == "M":
+            row_columns.append(column.astype("datetime64[us]").tolist())
+        # Convert everything else to base Python values
+        else:
+            row_columns.append(column.tolist())
+
+    # Zip the columns back together into rows
+    return [list(row) for row in zip(*row_columns)]
 
 
 def read_data_all(list_of_files):
     """
     A wrapper function for read_data that works with a list of file-paths.
-    Runs read_data on each of the file-paths.
+    Runs read_data on each of the file-paths, in parallel across separate processes.
     Returns a list of lists similar to read_data, except it's all the rows
-    (excluding headers) for all the csvs in list_of_files.
+    (excluding headers) for all the csvs in list_of_files, in the same order as list_of_files.
 
     ---------------------------------------------------------------------
     
     list_of_files = list, all the file-paths for the csvs that need to be read in.
     """
     all_data = list()
-    # Iterate through files, reading in data for each and appending to overall data
-    for file in list_of_files:
-        data = read_data(file)
-        all_data.extend(data)
+    # Read in each file in its own process, up to one process per CPU
+    num_processes = min(cpu_count(), len(list_of_files))
+
+    # Only worth starting extra processes if there's more than one file and CPU
+    if num_processes > 1:
+        with Pool(num_processes) as pool:
+            # Iterate through the data for each file (in file order), appending to overall data
+            for data in pool.imap(read_data, list_of_files):
+                all_data.extend(data)
+    else:
+        # Iterate through files, reading in data for each and appending to overall data
+        for file in list_of_files:
+            data = read_data(file)
+            all_data.extend(data)
         
     return all_data
 
@@ -214,16 +234,19 @@ def find_exceptions(tournaments, years, data):
     # Construct a dict to identify round robin matches with.
     rr_dict = {j:years[i] for i, j in enumerate(tournaments)}
     
-    # Iterate through lines, getting the indexes of round robin matches
+    # Round robin years for each tournament name in data, as a set so checking a year is fast.
+    # Built the first time each name is seen, from every key the name is in
+    # (so a name like "WTA Finals" gets the years of "BNP Paribas WTA Finals" too)
+    name_years = dict()
+
+    # Iterate through lines once, getting the indexes of round robin matches
     rr_indices = list()
-    for k,v in rr_dict.items():
-        rr_lines = [i for i, val in enumerate(data) 
-                    # Check tournament in key
-                    if val[0] in k 
-                    # and year in values
-                    and val[1].year in v]
-        # Add round robin indexes to list
-        rr_indices.extend(rr_lines)
+    for i, val in enumerate(data):
+        if val[0] not in name_years:
+            name_years[val[0]] = frozenset().union(*(v for k,v in rr_dict.items() if val[0] in k))
+        # Check year in values for the tournament
+        if val[1].year in name_years[val[0]]:
+            rr_indices.append(i)
     
     return rr_dict, rr_indices
 
@@ -246,10 +269,16 @@ def filter_round_robin(tournaments, years, data):
     # Get round robin dict and respective indexes of normal/round robin tournaments and years
     rr_dict,  rr_indices = find_exceptions(tournaments, years, data)
 
-    # Filter to normal match data
-    normal_data = [data[i] for i in range(len(data)) if i not in rr_indices]
-    # Filter to round robin match data
-    rr_data = [data[i] for i in range(len(data)) if i in rr_indices]
+    # Set of round robin indexes, so checking if a row is in it is fast
+    rr_set = set(rr_indices)
+    normal_data = list()
+    rr_data = list()
+    # Split data into normal match data and round robin match data in a single pass
+    for i, row in enumerate(data):
+        if i in rr_set:
+            rr_data.append(row)
+        else:
+            normal_data.append(row)
     
     return rr_dict, normal_data, rr_data
 
@@ -279,54 +308,69 @@ def reconstruct_brackets(data):
     
     data = list, list of lists (rows of data) returned by read_data_all
     """
-    # Get unique tournament-years
-    tourn_list = set([x[10] for x in data])
-    # Iterate through each tournament-year
-    for tourn in tourn_list:
-        # Select the data for the given tournament-year
-        tourn_data = [x for x in data if x[10] == tourn]
-
-        # Calculate the number of stages, log2 of the number of matches + 1
-        num_stages = math.log(len(tourn_data)+1, 2)
-        # Create a reversed range of this number of stages
-        # to iterate through. Reversed to help with neater round naming.
-        stage_iterable = list(range(round(num_stages), 0, -1))
-
-        # Iterate through each stage of tournament
-        for stage in stage_iterable:
-
-            # Get neat name for round
-            if stage in tournament_dict.keys():
-                round_name = tournament_dict[stage]
-            else:
-                round_name = f"Round {stage_iterable.index(stage) + 1}"  
-            
-            # Get unique losers and winners
-            losers = [x[12] for x in tourn_data if x[13] == 0]
-            winners = [x[11] for x in tourn_data if x[13] == 0]
-            # Set operation to determine the players who've only ever lost
-            # for the current stage. e.g. Round 1 losers would only ever have lost
-            # and so would only appear in the losers.
-            current_stage_losers = set(losers) - set(winners)
-            
-            # Iterate through tourn_data, updating brackets as needed
-            for row in tourn_data:
-                # Ignore rows that have already been reconstructed
-                if row[13] != 0:
-                    continue
-                
-                # If loser is in the losers of the current stage
-                if row[12] in current_stage_losers:
-                    # Update with the stage/round name
-                    row[13] = round_name
-                    # Also update with stage/round number (to help with algorithms later)
-                    row[14] = stage_iterable.index(stage) + 1
-                
-                # Check for 3rd place playoff
-                if stage == 2 and row[11] in current_stage_losers and row[12] in current_stage_losers:
-                    row[13] = tournament_dict["x"]
-                    # Also update with stage/round number (to help with algorithms later)
-                    row[14] = stage_iterable.index(stage) + 2
+    # Nothing to reconstruct
+    if not data:
+        return
+
+    # Encode each row's tournament-year and players as integer ids, using dicts of the
+    # unique values in order of first appearance
+    tourns = [row[10] for row in data]
+    tourn_lookup = {tourn: i for i, tourn in enumerate(dict.fromkeys(tourns))}
+    tourn_ids = np.fromiter(map(tourn_lookup.__getitem__, tourns), dtype=int, count=len(data))
+    players = [row[11] for row in data] + [row[12] for row in data]
+    player_lookup = {player: i for i, player in enumerate(dict.fromkeys(players))}
+    player_ids = np.fromiter(map(player_lookup.__getitem__, players), dtype=int, count=len(players))
+    # Combine them into ids for each player within each tournament-year, so that
+    # every tournament-year can be reconstructed at once.
+    # Re-encoded as 0 to n - 1, so there are at most 2 ids per row rather than one per tournament-year and player
+    unique_ids, pair_ids = np.unique(tourn_ids * len(player_lookup) + player_ids.reshape(2, -1), return_inverse = True)
+    win_ids, lose_ids = pair_ids.reshape(2, -1)
+    num_ids = len(unique_ids)
+
+    # Calculate the number of stages of each row's tournament-year, log2 of the number of matches + 1
+    num_stages = np.round(np.log2(np.bincount(tourn_ids) + 1)).astype(int)[tourn_ids]
+
+    # Round number and stage given to each row, 0 while it hasn't been reconstructed
+    round_nums = np.zeros(len(data), dtype=int)
+    row_stages = np.zeros(len(data), dtype=int)
+
+    # Iterate through the stages, from the first round towards the final
+    for i in range(num_stages.max()):
+        # Stage of each row's tournament-year at this round number
+        stage = num_stages - i
+        # Rows not yet reconstructed, in tournament-years that still have stages left
+        unplaced = (round_nums == 0) & (stage > 0)
+
+        # Players who've only ever lost for the current stage. e.g. Round 1 losers would
+        # only ever have lost and so would only appear in the losers.
+        stage_losers = np.zeros(num_ids, dtype=bool)
+        stage_losers[lose_ids[unplaced]] = True
+        stage_losers[win_ids[unplaced]] = False
+
+        # Update rows where the loser is in the losers of the current stage
+        placed = unplaced & stage_losers[lose_ids]
+        round_nums[placed] = i + 1
+        row_stages[placed] = stage[placed]
+
+        # Check for 3rd place playoff, marked with a stage of -1
+        third_place = unplaced & (stage == 2) & stage_losers[win_ids] & stage_losers[lose_ids]
+        round_nums[third_place] = i + 2
+        row_stages[third_place] = -1
+
+    # Write the round names and numbers back to the rows in a single pass
+    for row, round_num, stage in zip(data, round_nums.tolist(), row_stages.tolist()):
+        # Ignore rows that couldn't be reconstructed
+        if round_num == 0:
+            continue
+        # Get neat name for round
+        if stage == -1:
+            row[13] = tournament_dict["x"]
+        elif stage in tournament_dict:
+            row[13] = tournament_dict[stage]
+        else:
+            row[13] = f"Round {round_num}"
+        # Also update with stage/round number (to help with algorithms later)
+        row[14] = round_num
 
 
 def reconstruct_brackets_rr(rr_data):
@@ -342,46 +386,34 @@ def reconstruct_brackets_rr(rr_data):
     data = list, list of lists (rows of data) returned by read_data_all
     """
 
-    # Get unique tournament-years
-    tourn_list = set([x[10] for x in rr_data])
-    # Iterate through each tournament-year
-    for tourn in tourn_list:
-        # Select the data for the given tournament-year
-        tourn_data = [x for x in rr_data if x[10] == tourn]
-
-        # Get unique list of all players
-        all_players = [x[4] for x in tourn_data]
-        all_players.extend([x[5] for x in tourn_data])
-        # Drop duplicates
-        all_players = list(set(all_players))
-        # Create a dict to count the number of matches each player played
-        match_counter = {x:0 for x in all_players}
-
-        # Update the match_counter each time the player played
+    # Group the rows for each unique tournament-year in a single pass, keeping their order
+    # The rows are shallow copies, so updating them still updates rr_data
+    tourn_groups = defaultdict(list)
+    for row in rr_data:
+        tourn_groups[row[10]].append(row)
+    # Iterate through the data for each tournament-year
+    for tourn_data in tourn_groups.values():
+
+        # Count the number of matches each player played, in a single pass
+        # Counter starts unseen players at 0, so no list of unique players is needed first
+        match_counter = Counter()
         for row in tourn_data:
-            # Check if they were player 1
-            try:
-                # Increment matches played by 1 if so
-                match_counter[row[4]] += 1    
-            except KeyError:
-                pass
-            # Check if they were player 2
-            try:
-                # Increment matches played by 1 if so
-                match_counter[row[5]] += 1
-            except KeyError:
-                pass
+            # Increment player 1's matches played by 1
+            match_counter[row[4]] += 1
+            # Increment player 2's matches played by 1
+            match_counter[row[5]] += 1
 
         # Find min and max matches played
         # The if v > 2 statement is needed to account for
         # "alternates" where a player subs in for a retiree in the group stage
-        min_matches = min([v for v in match_counter.values() if v > 2])
+        min_matches = min(v for v in match_counter.values() if v > 2)
         max_matches = max(match_counter.values())
 
         # Find the players who lost in group stages/the group stage matches
-        group_stage_losers = [k for k,v in match_counter.items() if v <= min_matches]
+        # Sets, so checking if a player is in them is fast
+        group_stage_losers = {k for k,v in match_counter.items() if v <= min_matches}
         # Find the finalists / final
-        finalists = [k for k,v in match_counter.items() if v == max_matches]
+        finalists = {k for k,v in match_counter.items() if v == max_matches}
 
         # Counters to prevent players who played in both group and knockouts
         # from being recorded as playing in duplicate knockouts
@@ -484,4 +516,34 @@ col_dict_cols = ["Tournament", 'Start Date', 'End Date', 'Best Of',
                 'Results', 'Comment', 'Tournament-Start', 'Winner',
                 'Loser', 'Round', 'r']
 # Zip the cols into a dictionary to map with
-col_dict = dict(zip(col_dict_cols, range(len(col_dict_cols))))
\ No newline at end of file
+col_dict = dict(zip(col_dict_cols, range(len(col_dict_cols))))
+
+def get_date_years(data, year_col = "Start Date"):
+    """
+    Helper function to return the year of the chosen date column for every row in "data",
+    as a contiguous numpy array. It can be computed once, straight after the data is read in,
+    and then passed to analyse_data.filter_year() so the year isn't re-read from every row
+    each time the data is filtered.
+    ---------------------------------------------------------------------
+
+    data     = list, list of lists (rows of data) returned by e.g. read_data_all
+    year_col = string, the date column you want to select with col_dict
+    """
+    return np.array([row[col_dict[year_col]].year for row in data], dtype = np.int16)
+
+
+def get_columns(data, cols = None):
+    """
+    Helper function to turn "data" into a dict of numpy arrays, one array per column
+    (a struct of arrays rather than a list of rows). Columns are keyed by their
+    col_dict names, so filtering and analysis can work on whole columns at once.
+    It can be computed once and passed to functions like analyse_data.filter_condition().
+    ---------------------------------------------------------------------
+
+    data = list, list of lists (rows of data) returned by e.g. read_data_all
+    cols = list, the names of the columns to build arrays for. Defaults to all of col_dict_cols.
+    """
+    if cols is None:
+        cols = col_dict_cols
+
+    return {col : np.asarray([row[col_dict[col]] for row in data]) for col in cols}
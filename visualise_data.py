@@ -1,14 +1,21 @@
 # Imports
+import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.font_manager import FontProperties
 
 # Change font size for all plots to be larger
 plt.rcParams["font.size"] = 20
 
+# Fonts for titles and axis labels, built once rather than on every plot
+title_font = FontProperties(weight = "bold", size = 35)
+label_font = FontProperties(weight = "bold", size = 30)
+
 def plot_wta_wbw(
     comp_data, 
     wta_rank_filter = 9999,
     plot_wbw_scores = True,
-    make_axes_1_to_1 = False):
+    make_axes_1_to_1 = False,
+    max_points = 20000):
 
     """
     Plotting function that returns a scatter plot of either WTA ranks against
@@ -22,11 +29,19 @@ def plot_wta_wbw(
     plot_wbw_scores  = bool, if True will plot WTA ranks against WBW scores, 
     otherwise will plot WTA ranks against WBW ranks.
     make_axes_1_to_1 = bool, if True will rescale axes to be one-to-one.
+    max_points       = int, if there are more rows than this after filtering, a random
+    sample of this many rows is plotted instead, to keep drawing the plot quick.
     """
     # Select all rows where WTA rank is less or equal to the filter
     # Default of 9999 ensures all rows are selected
     plot_data = comp_data[comp_data[:, 1] <= wta_rank_filter]
 
+    # Downsample large data, as overlapping points are slow to draw but add little to the plot
+    # The seed is fixed so the same data always gives the same plot
+    if len(plot_data) > max_points:
+        sample = np.random.default_rng(0).choice(len(plot_data), max_points, replace = False)
+        plot_data = plot_data[sample]
+
     # Create plot fig
     fig, ax = plt.subplots(figsize = (24,12))
 
@@ -35,31 +50,17 @@ def plot_wta_wbw(
     if plot_wbw_scores:
         # Plot WTA rank against WBW scores
         ax.scatter(plot_data[:, 1], plot_data[:, 0], alpha = 0.1)
-        ax.set_ylabel("WBW Scores",
-                        labelpad = 10, 
-                        fontdict = {"weight" : "bold",
-                                        "size" : 30})
-
-        ax.set_title("Comparison of WTA Ranks with WBW Scores", 
-                    fontdict = {"weight" : "bold",
-                                "size" : 35},
-                                pad = 20)
+        ax.set_ylabel("WBW Scores", labelpad = 10, fontproperties = label_font)
+        ax.set_title("Comparison of WTA Ranks with WBW Scores", pad = 20, fontproperties = title_font)
 
     # Plot WBW in rank format
     else:
         ax.scatter(plot_data[:, 1], plot_data[:, 2], alpha = 0.1)
-        ax.set_ylabel("WBW Ranks", 
-                        labelpad = 10, 
-                        fontdict = {"weight" : "bold",
-                                    "size" : 30})
-        ax.set_title("Comparison of WTA Ranks with WBW Ranks", 
-        fontdict = {"weight" : "bold",
-                    "size" : 35},
-                    pad = 20)
+        ax.set_ylabel("WBW Ranks", labelpad = 10, fontproperties = label_font)
+        ax.set_title("Comparison of WTA Ranks with WBW Ranks", pad = 20, fontproperties = title_font)
 
     # Add titles and labels
-    ax.set_xlabel("WTA Ranks", labelpad = 10, fontdict = {"weight" : "bold",
-                                                        "size" : 30})
+    ax.set_xlabel("WTA Ranks", labelpad = 10, fontproperties = label_font)
 
     # Hide spines
     ax.spines["top"].set_visible(False)